@@ -18,15 +18,16 @@ Preliminaries
 
 # importing necessary libraries
 import os
+import shutil
+import argparse
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
+from torch.utils.tensorboard import SummaryWriter
 import seaborn as sns
 import matplotlib.pyplot as plt
-from torch.utils.data import DataLoader
-from torch.utils.data import TensorDataset
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import confusion_matrix
 from imblearn.over_sampling import SMOTE
@@ -52,38 +53,41 @@ Data Preprocessing
 df = pd.read_csv('UCI_Adult_Data.csv')
 
 # making income a binary variable
-df['income'] = df['income'].apply(lambda x: 1 if x == '>50K' else 0)
+df['income'] = (df['income'].to_numpy() == '>50K').astype(np.int8)
 
 # making gender a binary variable
-df['gender'] = df['gender'].apply(lambda x: 1 if x == 'Male' else 0)
+df['gender'] = (df['gender'].to_numpy() == 'Male').astype(np.int8)
 
 # classifying people into full and part time workers
-df['hours-per-week'] = df['hours-per-week'].apply(lambda x: 1 if x >= 40 else 0)
-
-# selecting only certain education classes
-df = df.query('education == "HS-grad" or education == "Some-college" or education == "Bachelors" \
-              or education == "Masters" or education == "Doctorate"')
+df['hours-per-week'] = (df['hours-per-week'].to_numpy() >= 40).astype(np.int8)
 
-# dropping '?' workclass and occupation
-df.drop(df[df['workclass'] == '?'].index, inplace=True)
-df.drop(df[df['occupation'] == '?'].index, inplace=True)
-df.drop(df[df['native-country'] == '?'].index, inplace=True)
+# selecting only certain education classes and dropping '?' workclass, occupation, and native-country rows
+df = df[df['education'].isin({'HS-grad', 'Some-college', 'Bachelors', 'Masters', 'Doctorate'})
+        & (df['workclass'] != '?')
+        & (df['occupation'] != '?')
+        & (df['native-country'] != '?')]
 
-# one hot encode the education and race columns
+# one hot encode the education and race columns (int8 is lossless for 0/1 dummies and 8x smaller than int64)
 new_df = pd.get_dummies(df, columns = ['education', 'race', 'workclass',
-                                       'occupation', 'relationship', 'native-country'], dtype = int)
+                                       'occupation', 'relationship', 'native-country'], dtype = np.int8)
 
 # dropping columns excluded from prediction
 new_df.drop('fnlwgt educational-num marital-status \
           capital-gain capital-loss'.split(),
           axis = 1, inplace = True)
 
-# standardize age covariate
-new_df['age'] = ( df['age'] - df['age'].mean() ) / df['age'].std()
+# build the feature matrix and labels as contiguous float32 arrays in a single pass so the
+# PyTorch tensors below can share their memory instead of copying it
+features = new_df.columns.drop('income')
+X = np.ascontiguousarray(new_df[features].to_numpy(dtype = np.float32))
+y = new_df['income'].to_numpy(dtype = np.float32)
+
+# standardize age covariate in place
+age_idx = features.get_loc('age')
+X[:, age_idx] -= X[:, age_idx].mean()
+X[:, age_idx] /= X[:, age_idx].std(ddof = 1)
 
 # The next few lines of code are to deal with our dataset having disproportionate classes
-X = new_df.drop('income', axis = 1)
-y = new_df['income']
 
 # instantiate SMOTE class
 smote = SMOTE(sampling_strategy = 'minority', random_state = 1024)
@@ -92,11 +96,11 @@ smote = SMOTE(sampling_strategy = 'minority', random_state = 1024)
 X_resampled, y_resampled = smote.fit_resample(X, y)
 
 # inspecting new class proportions
-(y_resampled.value_counts() / len(y_resampled)).round(4);
+(np.unique(y_resampled, return_counts = True)[1] / len(y_resampled)).round(4);
 
 # checking for NaNs
-X.isnull().values.any();
-y.isnull().values.any();
+np.isnan(X).any();
+np.isnan(y).any();
 
 # train and test split without SMOTE
 X_train, X_test, y_train, y_test = train_test_split(X, y,
@@ -108,84 +112,127 @@ X_train, X_val, y_train, y_val = train_test_split(X_train, y_train,
                                                     test_size = 0.25,
                                                     random_state = 1024)
 
-# convert features and labels to PyTorch tensors
-X_train_tensor = torch.tensor(X_train.values, dtype=torch.float32)
-y_train_tensor = torch.tensor(y_train.values, dtype=torch.float32)
-X_val_tensor = torch.tensor(X_val.values, dtype=torch.float32)
-y_val_tensor = torch.tensor(y_val.values, dtype=torch.float32)
-X_test_tensor = torch.tensor(X_test.values, dtype=torch.float32)
-y_test_tensor = torch.tensor(y_test.values, dtype=torch.float32)
-
-# creating training, evaluation, and tensor datasets
-train_data = TensorDataset(X_train_tensor, y_train_tensor)
-val_data = TensorDataset(X_val_tensor, y_val_tensor)
-test_data = TensorDataset(X_test_tensor, y_test_tensor)
-
-# set the batch size hyperparameter
-batch_size = 32
-
-# turn training data into iterables (batches)
-train_dataloader = DataLoader(train_data,
-    batch_size= batch_size,
-    shuffle = True
-)
-
-# turn validation data into iterables (batches)
-val_dataloader = DataLoader(val_data,
-    batch_size= batch_size,
-    shuffle = True
-)
-
-# turn testing data into iterables
-test_dataloader = DataLoader(test_data,
-    batch_size = batch_size,
-    shuffle = False # don't necessarily have to shuffle the testing data
-)
-
-# checking out dataloaders
-print(f"Dataloaders: {train_dataloader, val_dataloader, test_dataloader}")
-print(f"Length of train dataloader: {len(train_dataloader)} batches of {batch_size}")
-print(f"Length of val dataloader: {len(val_dataloader)} batches of {batch_size}")
-print(f"Length of test dataloader: {len(test_dataloader)} batches of {batch_size}")
+# convert features and labels to PyTorch tensors (from_numpy shares the float32 buffers without copying)
+X_train_tensor = torch.from_numpy(X_train)
+y_train_tensor = torch.from_numpy(y_train)
+X_val_tensor = torch.from_numpy(X_val)
+y_val_tensor = torch.from_numpy(y_val)
+X_test_tensor = torch.from_numpy(X_test)
+y_test_tensor = torch.from_numpy(y_test)
 
+# use the GPU if one is available
+device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
-"""
+# move a tensor to the device, pinning it first on CUDA so the host to device copy can run asynchronously
+def to_device(tensor):
+    if device == 'cuda':
+        return tensor.pin_memory().to(device, non_blocking = True)
+    return tensor.to(device)
 
-Data Visualization Using Original Data
 
-"""
+# the whole dataset is only a few megabytes, so move it to the device once and slice batches out of it
+# directly (a DataLoader only adds collate and iterator overhead for in-memory tabular data),
+# returns the (features, labels) pairs for the training, validation, and testing sets
+def load_to_device():
+    train_data = (to_device(X_train_tensor), to_device(y_train_tensor))
+    val_data = (to_device(X_val_tensor), to_device(y_val_tensor))
+    test_data = (to_device(X_test_tensor), to_device(y_test_tensor))
+    return train_data, val_data, test_data
+
+# number of observations in the training, validation, and testing sets
+n_train = X_train_tensor.shape[0]
+n_val = X_val_tensor.shape[0]
+n_test = X_test_tensor.shape[0]
+
+# set the batch size hyperparameter (large enough that each step is not dominated by per-kernel overhead)
+batch_size = 512
 
+# number of batches in the training and validation sets (the testing set is used in a single pass)
+n_train_batches = int(np.ceil(n_train / batch_size))
+n_val_batches = int(np.ceil(n_val / batch_size))
 
-# figure size for the two subplots below
-plt.figure(figsize = (10, 10))
 
-# countplot of income grouped by gender
-plt.subplot(2, 1, 1)
-sns.countplot(data = df, x = 'income', hue = 'gender').set_xticklabels(['<=50K', '>50K'])
-plt.title('Count Plot of Income by Gender')
-plt.xlabel('Income')
-plt.ylabel('Count')
-plt.legend(title = 'Gender', loc = 'upper right', labels = ['Female', 'Male'])
+"""
+
+Data Visualization Using Original Data
 
-# kde plot for age grouped by income
-plt.subplot(2, 1, 2)
-sns.kdeplot(data = df, x = 'age', hue = 'income')
-plt.title("KDE Plot for Age by Income")
-plt.xlabel('Age')
-plt.legend(title = 'Income', loc = 'upper right', labels = ['>50K', '<=50K'])
+"""
 
-# show the above plots
-plt.tight_layout()
-plt.show()
 
-# countplot of income grouped by occupation
-sns.countplot(data = df, x = 'income', hue = 'occupation')
-plt.title('Count Plot of Income by Occupation')
-plt.xlabel('Income')
-plt.ylabel('Count')
-plt.xticks(range(2), ['<= 50K', '>50K'])
-plt.legend(title = 'Occupation', bbox_to_anchor=(1.25, 1), borderaxespad=0)
-plt.show()
+# plots of the original data (only shown when the script is run with --plot)
+def make_plots(df):
+    # figure size for the two subplots below
+    plt.figure(figsize = (10, 10))
+
+    # countplot of income grouped by gender
+    plt.subplot(2, 1, 1)
+    sns.countplot(data = df, x = 'income', hue = 'gender').set_xticklabels(['<=50K', '>50K'])
+    plt.title('Count Plot of Income by Gender')
+    plt.xlabel('Income')
+    plt.ylabel('Count')
+    plt.legend(title = 'Gender', loc = 'upper right', labels = ['Female', 'Male'])
+
+    # kde plot for age grouped by income
+    plt.subplot(2, 1, 2)
+    sns.kdeplot(data = df, x = 'age', hue = 'income')
+    plt.title("KDE Plot for Age by Income")
+    plt.xlabel('Age')
+    plt.legend(title = 'Income', loc = 'upper right', labels = ['>50K', '<=50K'])
+
+    # show the above plots
+    plt.tight_layout()
+    plt.show()
+
+    # countplot of income grouped by occupation
+    sns.countplot(data = df, x = 'income', hue = 'occupation')
+    plt.title('Count Plot of Income by Occupation')
+    plt.xlabel('Income')
+    plt.ylabel('Count')
+    plt.xticks(range(2), ['<= 50K', '>50K'])
+    plt.legend(title = 'Occupation', bbox_to_anchor=(1.25, 1), borderaxespad=0)
+    plt.show()
+
+
+# plot the training and validation loss and accuracy over epochs
+def plot_training(train_losses, val_losses, train_accuracies, val_accuracies):
+    # plot training loss and validation loss
+    plt.figure(figsize=(10, 8))
+    plt.subplot(2, 1, 1)
+    plt.plot(range(len(train_losses)), train_losses, label = 'Training Loss', color = 'blue')
+    plt.plot(range(len(val_losses)), val_losses, label = 'Validation Loss', color = 'red')
+    plt.xlabel('Epoch')
+    plt.ylabel('Loss')
+    plt.title('Training and Validation Loss Over Epochs')
+    plt.legend()
+
+    # plot training accuracy and validation accuracy
+    plt.subplot(2, 1, 2)
+    plt.plot(range(len(train_accuracies)), train_accuracies, label = 'Training Accuracy', color = 'blue')
+    plt.plot(range(len(val_accuracies)), val_accuracies, label = 'Validation Accuracy', color = 'red')
+    plt.xlabel('Epoch')
+    plt.ylabel('Accuracy')
+    plt.title('Training and Validation Accuracy Over Epochs')
+    plt.legend()
+
+    # show the above plots
+    plt.tight_layout()
+    plt.show()
+
+
+# plot a confusion matrix as a heatmap
+def plot_confusion_matrix(y_true_tracker, y_pred_tracker):
+    # create confusion matrix
+    conf_matrix = confusion_matrix(y_true_tracker, y_pred_tracker)
+
+    # create a heatmap of the confusion matrix
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(conf_matrix, annot = True, fmt = 'd', cmap = 'Blues',
+                xticklabels=['Predicted 0', 'Predicted 1'],
+                yticklabels=['Actual 0', 'Actual 1'])
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+    plt.title('Confusion Matrix')
+    plt.show()
 
 
 """
@@ -195,6 +242,13 @@ Building Neural Networks
 """
 
 
+# allow TF32 tensor cores for matrix multiplications and let cuDNN pick the fastest algorithms
+# (the batch size is fixed, so the benchmarked choice is cached after the first batch)
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+torch.backends.cudnn.benchmark = True
+
+
 # creating linear neural network
 class nn_model_0(nn.Module):
     # input shape is number of features
@@ -209,6 +263,31 @@ class nn_model_0(nn.Module):
     def forward(self, x):
         return self.layer_stack(x)
 
+    # inference only network, the two Linear layers have no activation between them so they collapse
+    # into a single Linear layer with W = W2 W1 and b = W2 b1 + b2
+    def fuse_for_inference(self):
+        first, second = self.layer_stack[0], self.layer_stack[1]
+        with torch.no_grad():
+            fused = nn.Linear(in_features = first.in_features, out_features = second.out_features)
+            fused = fused.to(first.weight.device)
+            fused.weight.copy_(second.weight @ first.weight)
+            fused.bias.copy_(second.weight @ first.bias + second.bias)
+        return fused.eval()
+
+
+# fold an evaluation mode BatchNorm1d layer into the Linear layer that follows it
+def fuse_bn_into_linear(bn: nn.BatchNorm1d, linear: nn.Linear) -> nn.Linear:
+    with torch.no_grad():
+        # in evaluation mode BatchNorm1d is the elementwise affine map x * scale + shift
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        shift = bn.bias - bn.running_mean * scale
+        # W(x * scale + shift) + b = (W * scale)x + (W shift + b)
+        fused = nn.Linear(in_features = linear.in_features, out_features = linear.out_features)
+        fused = fused.to(linear.weight.device)
+        fused.weight.copy_(linear.weight * scale.unsqueeze(0))
+        fused.bias.copy_(linear.weight @ shift + linear.bias)
+    return fused
+
 
 # creating non-linear neural network
 class nn_model_1(nn.Module):
@@ -232,6 +311,19 @@ class nn_model_1(nn.Module):
     def forward(self, x):
         return self.layer_stack(x)
 
+    # inference only network with the BatchNorm layers folded into the next Linear layers
+    # (dropout does nothing in evaluation mode so it is dropped as well)
+    def fuse_for_inference(self):
+        layers = self.layer_stack
+        return nn.Sequential(
+            layers[0],
+            layers[1],
+            fuse_bn_into_linear(layers[2], layers[4]),
+            layers[5],
+            fuse_bn_into_linear(layers[6], layers[8]),
+            layers[9]
+        ).eval()
+
 
 # creating linear neural network similar to nn_model_2
 class nn_model_2(nn.Module):
@@ -252,261 +344,33 @@ class nn_model_2(nn.Module):
     def forward(self, x):
         return self.layer_stack(x)
 
-# instantiate nn_model_0 class
-model_0 = nn_model_0(input_shape = X_train_tensor.shape[1], # input should be shape of feature matrix
-    hidden_units = 25, # how many units in the hiden layer
-    output_shape = 1 # out features is one because we have a binary classifcation problem
-)
 
-# instantiate nn_model_1 class
-model_1 = nn_model_1(input_shape = X_train_tensor.shape[1],
-    hidden_units = 25,
-    output_shape = 1
-)
+# instantiate the three networks on the device the data lives on
+def build_models(input_shape: int):
+    # instantiate nn_model_0 class
+    model_0 = nn_model_0(input_shape = input_shape, # input should be shape of feature matrix
+        hidden_units = 25, # how many units in the hiden layer
+        output_shape = 1 # out features is one because we have a binary classifcation problem
+    )
 
-# instantiate nn_model_1 class
-model_2 = nn_model_2(input_shape = X_train_tensor.shape[1],
-    hidden_units = 25,
-    output_shape = 1
-)
+    # instantiate nn_model_1 class
+    model_1 = nn_model_1(input_shape = input_shape,
+        hidden_units = 25,
+        output_shape = 1
+    )
 
+    # instantiate nn_model_2 class
+    model_2 = nn_model_2(input_shape = input_shape,
+        hidden_units = 25,
+        output_shape = 1
+    )
 
-"""
+    return model_0.to(device), model_1.to(device), model_2.to(device)
 
-Neural Network Model 0 Creation
 
 """
 
-
-# defining the loss function
-loss_fn = nn.BCEWithLogitsLoss()
-
-# defining the optimizer (SGD with momentum seemed to work best)
-optimizer_0 = torch.optim.SGD(params = model_0.parameters(), lr = 0.01, momentum = 0.9, nesterov = True)
-
-# set seed for reproducibility
-torch.manual_seed(1024)
-
-# delete the 'logs' directory before running training and validation loop to avoid avoid TensorBoard plot issue
-import shutil
-if os.path.exists('logs/') and os.path.isdir('logs/'):
-    shutil.rmtree('logs/')
-
-# import TensorBoard
-from torch.utils.tensorboard import SummaryWriter
-
-# create a directory to store TensorBoard logs
-log_dir = 'logs/'
-os.makedirs(log_dir, exist_ok = True)
-
-# initialize TensorBoard writer
-writer = SummaryWriter(log_dir = log_dir)
-
-# set the number of epochs (how many times the model will pass over the training data)
-epochs = 30
-
-# lists to store training and validation loss, accuracy, predictions, and true labels
-train_losses = []
-val_losses = []
-train_accuracies = []
-val_accuracies = []
-y_pred_tracker = []
-y_true_tracker = []
-
-# parameters needed for early stopping
-best_val_loss = float('inf') # initalize to large value
-epochs_without_improvement = 0 # keeps track of number of epochs were validation loss has not improved
-patience = 10 # once validation loss has not improved for more than 10 epochs, break validation loop
-
-# create training and testing loop for model_0
-for epoch in range(epochs):
-    print(f"Epoch: {epoch}\n-------")
-
-    # parameters to keep track of training over epochs
-    train_loss = 0
-    train_correct = 0
-    train_total = 0
-    train_accuracy = 0
-
-    # set the model to train mode
-    model_0.train()
-
-    # loop over each batch of data
-    for batch, (X, y) in enumerate(train_dataloader):
-
-        # forward pass (model outputs raw logits)
-        y_logits = model_0(X).squeeze()
-
-        # convert logits to predictions
-        y_pred = torch.round(torch.sigmoid(y_logits))
-
-        # calculate loss
-        loss = loss_fn(y_logits, y)
-
-        # optimizer zero grad
-        optimizer_0.zero_grad()
-
-        # backward pass
-        loss.backward()
-
-        # update parameters
-        optimizer_0.step()
-
-        # accumulate batch loss
-        train_loss += loss.item()
-
-        # accumulate correct predictions
-        train_correct += (y_pred == y).sum().item()
-
-        # accumulate total number of training examples (increases by 32 each time)
-        train_total += len(y)
-
-    # divide total train loss by length of train dataloader (average loss per batch for the epoch)
-    train_loss /= len(train_dataloader)
-
-    # append the training loss for the epoch to the train_losses list
-    train_losses.append(train_loss)
-
-    # write the training loss to file (used for TensorBoard)
-    writer.add_scalar('Loss/Train', train_loss, epoch)
-
-    # calculate training accuracy for the epoch
-    train_accuracy = 100 * train_correct / train_total
-
-    # append the accuracy for the epoch to the train_accur list
-    train_accuracies.append(train_accuracy)
-
-    # write the training accuracy to a file (used for TensorBoard)
-    writer.add_scalar('Accuracy/Train', train_accuracy, epoch)
-
-    # parameters to keep track of validation over epochs
-    val_loss = 0
-    val_correct = 0
-    val_total = 0
-    val_accuracy = 0
-
-    # set the model to evaluation model
-    model_0.eval()
-
-    # begin the inference procedure
-    with torch.inference_mode():
-        # loop through each batch of data in the validation set
-        for batch, (X, y) in enumerate(val_dataloader):
-
-            # forward pass
-            y_logits = model_0(X).squeeze()
-
-            # convert logits to binary predictions (0 or 1)
-            y_pred = torch.round(torch.sigmoid(y_logits))
-
-            # accumulate validation loss
-            val_loss += loss_fn(y_logits, y).item()
-
-            # accumulate correct predictions
-            val_correct += (y_pred == y).sum().item()
-
-            # accumulate the length of the batch size (increases by 32 each time)
-            val_total += len(y)
-
-        # check if the validation loss has improved for this epoch
-        if val_loss < best_val_loss:
-            # update the best validation loss
-            best_val_loss = val_loss
-            # reset the counter
-            counter = 0
-        # if validation loss did not improve, increase the counter
-        else:
-            counter += 1
-
-        # if early stopping criteria has been met, break the loop
-        if counter >= patience:
-            print(f'Early stopping: No improvement in validation loss for {patience} epochs.')
-            break
-
-        # divide total validation loss by length of validation dataloader (average loss per batch for epoch)
-        val_loss /= len(val_dataloader)
-
-        # append the validation loss for the epoch to the train_losses list
-        val_losses.append(val_loss)
-
-        # write the validation loss to file (used for TensorBoard)
-        writer.add_scalar('Loss/Validation', val_loss, epoch)
-
-        # Calculate validation accuracy for the epoch
-        val_accuracy = 100 * val_correct / val_total
-
-        # append the accuracy for the epoch to the train_accur list
-        val_accuracies.append(val_accuracy)
-
-        # convert y_pred from a tensor to a numpy array
-        y_pred_numpy = y_pred.numpy()
-
-        # convert true y label from tensor to numpy array
-        y_true_numpy = y.numpy()
-
-        # append the predictions for the batch to the y_pred_tracker list
-        y_pred_tracker.extend(y_pred_numpy)
-
-        # append the true labels for the batch to the y_true_tracker list
-        y_true_tracker.extend(y_true_numpy)
-
-        # write the validation accuracy to file (used for TensorBoard)
-        writer.add_scalar('Accuracy/Validation', val_accuracy, epoch)
-
-    # print training loss and accuracy for each epoch
-    print(f'Train loss: {train_loss:.5f} | Training acc: {train_accuracy:.2f} %\n')
-
-    # print validation loss and accuracy for each epoch
-    print(f'Validation loss: {val_loss:.5f} |  Validation acc: {val_accuracy:.2f} %\n')
-
-# mean training loss and accuracy
-print(f'The mean training loss and accuracy over {epochs} epochs is {np.array(train_losses).mean().round(4)} \
-    and {np.array(train_accuracies).mean().round(4)}, respectively.')
-
-# mean validation loss and accuracy
-print(f'The mean validation loss and accuracy over {epochs} epochs is {np.array(val_losses).mean().round(4)} \
-    and {np.array(val_accuracies).mean().round(4)}.')
-
-# plot training loss and validation loss
-plt.figure(figsize=(10, 8))
-plt.subplot(2, 1, 1)
-plt.plot(range(len(train_losses)), train_losses, label = 'Training Loss', color = 'blue')
-plt.plot(range(len(val_losses)), val_losses, label = 'Validation Loss', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Loss')
-plt.title('Training and Validation Loss Over Epochs')
-plt.legend()
-
-# plot training accuracy and validation accuracy
-plt.subplot(2, 1, 2)
-plt.plot(range(len(train_accuracies)), train_accuracies, label = 'Training Accuracy', color = 'blue')
-plt.plot(range(len(val_accuracies)), val_accuracies, label = 'Validation Accuracy', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Accuracy')
-plt.title('Training and Validation Accuracy Over Epochs')
-plt.legend()
-
-# show the above plots
-plt.tight_layout()
-plt.show()
-
-# create confusion matrix
-conf_matrix = confusion_matrix(y_true_tracker, y_pred_tracker)
-
-# create a heatmap of the confusion matrix
-plt.figure(figsize=(8, 6))
-sns.heatmap(conf_matrix, annot = True, fmt = 'd', cmap = 'Blues',
-            xticklabels=['Predicted 0', 'Predicted 1'],
-            yticklabels=['Actual 0', 'Actual 1'])
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix')
-plt.show()
-
-
-"""
-
-Neural Network Model 1 Creation
+Neural Network Training
 
 """
 
@@ -514,543 +378,338 @@ Neural Network Model 1 Creation
 # defining the loss function
 loss_fn = nn.BCEWithLogitsLoss()
 
-# defining the optimizer (SGD with momentum seemed to work best)
-optimizer_1 = torch.optim.SGD(params = model_1.parameters(), lr = 0.01, momentum = 0.9, nesterov = True)
-
-# set seed for reproducibility
-torch.manual_seed(1024)
-
-# delete the 'logs' directory before running training and validation loop to avoid avoid TensorBoard plot issue
-import shutil
-if os.path.exists('logs/') and os.path.isdir('logs/'):
-    shutil.rmtree('logs/')
-
-# import TensorBoard
-from torch.utils.tensorboard import SummaryWriter
-
-# create a directory to store TensorBoard logs
-log_dir = 'logs/'
-os.makedirs(log_dir, exist_ok = True)
-
-# initialize TensorBoard writer
-writer = SummaryWriter(log_dir = log_dir)
-
-# set the number of epochs (how many times the model will pass over the training data)
-epochs = 30
-
-# lists to store training and validation loss, accuracy, predictions, and true labels
-train_losses = []
-val_losses = []
-train_accuracies = []
-val_accuracies = []
-y_pred_tracker = []
-y_true_tracker = []
-
-# parameters needed for early stopping
-best_val_loss = float('inf') # initalize to large value
-epochs_without_improvement = 0 # keeps track of number of epochs were validation loss has not improved
-patience = 10 # once validation loss has not improved for more than 10 epochs, break validation loop
-
-# create training and testing loop for model_1
-for epoch in range(epochs):
-    print(f"Epoch: {epoch}\n-------")
-
-    # parameters to keep track of training over epochs
-    train_loss = 0
-    train_correct = 0
-    train_total = 0
-    train_accuracy = 0
-
-    # set the model to train mode
-    model_1.train()
 
-    # loop over each batch of data (recall the batch size of 32)
-    for batch, (X, y) in enumerate(train_dataloader):
+# compile a model or function into one captured graph (for networks this small, Python dispatch overhead
+# rather than the matrix multiplications dominates the run time), falling back to eager mode when compiling
+# is not supported (torch 2.0 refuses on Windows and Python 3.11+) or fails when a graph is first compiled
+def maybe_compile(fn, **kwargs):
+    try:
+        compiled = torch.compile(fn, **kwargs)
+    except RuntimeError:
+        return fn
+
+    # compilation is lazy, so graph breaks and backend failures only show up when the graph is compiled
+    # on a call (the first one, or a later one with a new input shape)
+    def run(*args):
+        nonlocal compiled
+        if compiled is not None:
+            try:
+                return compiled(*args)
+            except Exception as error:
+                print(f'torch.compile failed ({type(error).__name__}: {error}), falling back to eager mode')
+                compiled = None
+        return fn(*args)
+
+    return run
+
+
+# training and validation loop with early stopping, returns the loss and accuracy history
+# (train_data and val_data are (features, labels) pairs on the same device as the model)
+def train(model, optimizer, writer, train_data, val_data, epochs: int = 30, patience: int = 10):
+    # unpack the training and validation sets and their sizes
+    X_train_tensor, y_train_tensor = train_data
+    X_val_tensor, y_val_tensor = val_data
+    n_train, n_val = X_train_tensor.shape[0], X_val_tensor.shape[0]
+    n_train_batches = int(np.ceil(n_train / batch_size))
+    n_val_batches = int(np.ceil(n_val / batch_size))
+    data_device = X_train_tensor.device
+
+    # forward pass and loss calculation as a single training step
+    def train_step(X, y):
+        # run in bfloat16 (same exponent range as float32, so no gradient scaling is needed)
+        with torch.autocast(device_type = data_device.type, dtype = torch.bfloat16):
+            # forward pass (model outputs raw logits)
+            y_logits = model(X).squeeze()
+            # calculate loss
+            loss = loss_fn(y_logits, y)
+        return loss, y_logits
+
+    # compile the training step over the uncompiled model (no CUDA graphs, since the logits of every
+    # batch are kept until the end of the epoch and CUDA graphs would reuse their buffers)
+    train_step = maybe_compile(train_step, fullgraph = True)
+
+    # separately compiled model for the validation loop, where the outputs are not kept between batches
+    eval_model = maybe_compile(model, mode = 'reduce-overhead', fullgraph = True)
+
+    # lists to store training and validation loss, accuracy, predictions, and true labels
+    train_losses = []
+    val_losses = []
+    train_accuracies = []
+    val_accuracies = []
+    y_pred_tracker = []
+    y_true_tracker = []
+
+    # parameters needed for early stopping
+    best_val_loss = float('inf') # initalize to large value
+    epochs_without_improvement = 0 # keeps track of number of epochs were validation loss has not improved
+
+    # create training and testing loop for the model
+    for epoch in range(epochs):
+        print(f"Epoch: {epoch}\n-------")
+
+        # parameters to keep track of training over epochs (the loss is accumulated on the device
+        # so that no batch has to wait for its loss to be copied back to the CPU)
+        train_loss = torch.zeros((), device = data_device)
+        train_logits = []
+        train_labels = []
+        train_accuracy = 0
+
+        # set the model to train mode
+        model.train()
+
+        # shuffle the training data by drawing a random permutation of the row indices
+        perm = torch.randperm(n_train, device = data_device)
+
+        # loop over each batch of data (recall the batch size of 512)
+        for i in range(0, n_train, batch_size):
+            # slice the batch out of the preloaded training tensors
+            idx = perm[i:i + batch_size]
+            X, y = X_train_tensor[idx], y_train_tensor[idx]
+
+            # forward pass and loss calculation
+            loss, y_logits = train_step(X, y)
+
+            # optimizer zero grad
+            optimizer.zero_grad(set_to_none = True)
+
+            # backward pass
+            loss.backward()
+
+            # update parameters
+            optimizer.step()
+
+            # accumulate batch loss
+            train_loss += loss.detach()
+
+            # store logits and labels (predictions are only computed once at the end of the epoch)
+            train_logits.append(y_logits.detach())
+            train_labels.append(y)
+
+        # convert the logits for the epoch to binary predictions (0 or 1) and count the correct ones
+        # (sigmoid(x) > 0.5 is the same as x > 0, so the sigmoid and rounding can be skipped)
+        y_pred = (torch.cat(train_logits) > 0).to(y.dtype)
+        train_correct = (y_pred == torch.cat(train_labels)).sum().item()
+
+        # divide total train loss by number of train batches (average loss per batch for the epoch)
+        train_loss = train_loss.item() / n_train_batches
+
+        # append the training loss for the epoch to the train_losses list
+        train_losses.append(train_loss)
+
+        # write the training loss to file (used for TensorBoard)
+        writer.add_scalar('Loss/Train', train_loss, epoch)
+
+        # calculate training accuracy for the epoch (every training example is used once per epoch)
+        train_accuracy = 100 * train_correct / n_train
 
-        # forward pass (model outputs raw logits)
-        y_logits = model_1(X).squeeze()
-
-        # convert logits to binary predictions (0 or 1)
-        y_pred = torch.round(torch.sigmoid(y_logits))
-
-        # calculate loss
-        loss = loss_fn(y_logits, y)
+        # append the accuracy for the epoch to the train_accur list
+        train_accuracies.append(train_accuracy)
 
-        # optimizer zero grad
-        optimizer_1.zero_grad()
+        # write the training accuracy to a file (used for TensorBoard)
+        writer.add_scalar('Accuracy/Train', train_accuracy, epoch)
 
-        # backward pass
-        loss.backward()
+        # parameters to keep track of validation over epochs (accumulated on the device)
+        val_loss = torch.zeros((), device = data_device)
+        val_correct = torch.zeros((), device = data_device)
+        val_accuracy = 0
 
-        # update parameters
-        optimizer_1.step()
+        # set the model to evaluation model
+        model.eval()
 
-        # accumulate batch loss
-        train_loss += loss.item()
+        # begin the inference procedure
+        with torch.inference_mode():
+            # loop through each batch of data in the validation set
+            for i in range(0, n_val, batch_size):
+                # slice the batch out of the preloaded validation tensors
+                X, y = X_val_tensor[i:i + batch_size], y_val_tensor[i:i + batch_size]
 
-        # accumulate correct predictions
-        train_correct += (y_pred == y).sum().item()
+                # forward pass
+                y_logits = eval_model(X).squeeze()
 
-        # accumulate total number of training examples (increases by 32 each time)
-        train_total += len(y)
+                # convert logits to binary predictions (0 or 1), sigmoid(x) > 0.5 is the same as x > 0
+                y_pred = (y_logits > 0).to(y.dtype)
 
-    # divide total train loss by length of train dataloader (average loss per batch for the epoch)
-    train_loss /= len(train_dataloader)
+                # accumulate validation loss
+                val_loss += loss_fn(y_logits, y)
 
-    # append the training loss for the epoch to the train_losses list
-    train_losses.append(train_loss)
+                # accumulate correct predictions
+                val_correct += (y_pred == y).sum()
 
-    # write the training loss to file (used for TensorBoard)
-    writer.add_scalar('Loss/Train', train_loss, epoch)
+            # copy the accumulated validation loss and correct predictions back to the CPU once per epoch
+            # and divide total validation loss by number of validation batches (average loss per batch for epoch)
+            val_loss = val_loss.item() / n_val_batches
+            val_correct = int(val_correct.item())
 
-    # calculate training accuracy for the epoch
-    train_accuracy = 100 * train_correct / train_total
+            # check if the validation loss has improved for this epoch
+            if val_loss < best_val_loss:
+                # update the best validation loss
+                best_val_loss = val_loss
+                # reset the counter
+                epochs_without_improvement = 0
+            # if validation loss did not improve, increase the counter
+            else:
+                epochs_without_improvement += 1
 
-    # append the accuracy for the epoch to the train_accur list
-    train_accuracies.append(train_accuracy)
+            # append the validation loss for the epoch to the train_losses list
+            val_losses.append(val_loss)
 
-    # write the training accuracy to a file (used for TensorBoard)
-    writer.add_scalar('Accuracy/Train', train_accuracy, epoch)
+            # write the validation loss to file (used for TensorBoard)
+            writer.add_scalar('Loss/Validation', val_loss, epoch)
 
-    # parameters to keep track of validation over epochs
-    val_loss = 0
-    val_correct = 0
-    val_total = 0
-    val_accuracy = 0
+            # Calculate validation accuracy for the epoch
+            val_accuracy = 100 * val_correct / n_val
 
-    # set the model to evaluation model
-    model_1.eval()
+            # append the accuracy for the epoch to the train_accur list
+            val_accuracies.append(val_accuracy)
 
-    # begin the inference procedure
-    with torch.inference_mode():
-        # loop through each batch of data in the validation set
-        for batch, (X, y) in enumerate(val_dataloader):
+            # convert y_pred from a tensor to a numpy array
+            y_pred_numpy = y_pred.cpu().numpy()
 
-            # forward pass
-            y_logits = model_1(X).squeeze()
+            # convert true y label from tensor to numpy array
+            y_true_numpy = y.cpu().numpy()
 
-            # convert logits to binary predictions (0 or 1)
-            y_pred = torch.round(torch.sigmoid(y_logits))
+            # append the predictions for the batch to the y_pred_tracker list
+            y_pred_tracker.extend(y_pred_numpy)
 
-            # accumulate validation loss
-            val_loss += loss_fn(y_logits, y).item()
+            # append the true labels for the batch to the y_true_tracker list
+            y_true_tracker.extend(y_true_numpy)
 
-            # accumulate correct predictions
-            val_correct += (y_pred == y).sum().item()
+            # write the validation accuracy to file (used for TensorBoard)
+            writer.add_scalar('Accuracy/Validation', val_accuracy, epoch)
 
-            # accumulate the length of the batch size (increases by 32 each time)
-            val_total += len(y)
+        # print training loss and accuracy for each epoch
+        print(f'Train loss: {train_loss:.5f} | Training acc: {train_accuracy:.2f} %\n')
 
-        # check if the validation loss has improved for this epoch
-        if val_loss < best_val_loss:
-            # update the best validation loss
-            best_val_loss = val_loss
-            # reset the counter
-            counter = 0
-        # if validation loss did not improve, increase the counter
-        else:
-            counter += 1
+        # print validation loss and accuracy for each epoch
+        print(f'Validation loss: {val_loss:.5f} |  Validation acc: {val_accuracy:.2f} %\n')
 
-        # if early stopping criteria has been met, break the loop
-        if counter >= patience:
+        # if early stopping criteria has been met, break the loop (after the epoch has been recorded)
+        if epochs_without_improvement >= patience:
             print(f'Early stopping: No improvement in validation loss for {patience} epochs.')
             break
 
-        # divide total validation loss by length of validation dataloader (average loss per batch for epoch)
-        val_loss /= len(val_dataloader)
-
-        # append the validation loss for the epoch to the train_losses list
-        val_losses.append(val_loss)
-
-        # write the validation loss to file (used for TensorBoard)
-        writer.add_scalar('Loss/Validation', val_loss, epoch)
-
-        # Calculate validation accuracy for the epoch
-        val_accuracy = 100 * val_correct / val_total
-
-        # append the accuracy for the epoch to the train_accur list
-        val_accuracies.append(val_accuracy)
-
-        # convert y_pred from a tensor to a numpy array
-        y_pred_numpy = y_pred.numpy()
-
-        # convert true y label from tensor to numpy array
-        y_true_numpy = y.numpy()
-
-        # append the predictions for the batch to the y_pred_tracker list
-        y_pred_tracker.extend(y_pred_numpy)
-
-        # append the true labels for the batch to the y_true_tracker list
-        y_true_tracker.extend(y_true_numpy)
-
-        # write the validation accuracy to file (used for TensorBoard)
-        writer.add_scalar('Accuracy/Validation', val_accuracy, epoch)
-
-    # print training loss and accuracy for each epoch
-    print(f'Train loss: {train_loss:.5f} | Training acc: {train_accuracy:.2f} %\n')
-
-    # print validation loss and accuracy for each epoch
-    print(f'Validation loss: {val_loss:.5f} |  Validation acc: {val_accuracy:.2f} %\n')
-
-# mean training loss and accuracy
-print(f'The mean training loss and accuracy over {epochs} epochs is {np.array(train_losses).mean().round(4)} \
-    and {np.array(train_accuracies).mean().round(4)}, respectively.')
-
-# mean validation loss and accuracy
-print(f'The mean validation loss and accuracy over {epochs} epochs is {np.array(val_losses).mean().round(4)} \
-    and {np.array(val_accuracies).mean().round(4)}.')
-
-# plot training loss and validation loss
-plt.figure(figsize=(10, 8))
-plt.subplot(2, 1, 1)
-plt.plot(range(len(train_losses)), train_losses, label = 'Training Loss', color = 'blue')
-plt.plot(range(len(val_losses)), val_losses, label = 'Validation Loss', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Loss')
-plt.title('Training and Validation Loss Over Epochs')
-plt.legend()
-
-# plot training accuracy and validation accuracy
-plt.subplot(2, 1, 2)
-plt.plot(range(len(train_accuracies)), train_accuracies, label = 'Training Accuracy', color = 'blue')
-plt.plot(range(len(val_accuracies)), val_accuracies, label = 'Validation Accuracy', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Accuracy')
-plt.title('Training and Validation Accuracy Over Epochs')
-plt.legend()
-
-# show the above plots
-plt.tight_layout()
-plt.show()
-
-# create confusion matrix
-conf_matrix = confusion_matrix(y_true_tracker, y_pred_tracker)
+    # mean training loss and accuracy
+    print(f'The mean training loss and accuracy over {len(train_losses)} epochs is {np.array(train_losses).mean().round(4)} \
+        and {np.array(train_accuracies).mean().round(4)}, respectively.')
 
-# create a heatmap of the confusion matrix
-plt.figure(figsize=(8, 6))
-sns.heatmap(conf_matrix, annot = True, fmt = 'd', cmap = 'Blues',
-            xticklabels=['Predicted 0', 'Predicted 1'],
-            yticklabels=['Actual 0', 'Actual 1'])
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix')
-plt.show()
+    # mean validation loss and accuracy
+    print(f'The mean validation loss and accuracy over {len(val_losses)} epochs is {np.array(val_losses).mean().round(4)} \
+        and {np.array(val_accuracies).mean().round(4)}.')
 
+    return train_losses, val_losses, train_accuracies, val_accuracies, y_true_tracker, y_pred_tracker
 
 
 """
 
-Neural Network Model 2 Creation
+Neural Network Testing
 
 """
 
 
-# defining the loss function
-loss_fn = nn.BCEWithLogitsLoss()
-
-# defining the optimizer (SGD with momentum seemed to work best)
-optimizer_2 = torch.optim.SGD(params = model_2.parameters(), lr = 0.01, momentum = 0.9, nesterov = True)
-
-# set seed for reproducibility
-torch.manual_seed(1024)
-
-# delete the 'logs' directory before running training and validation loop to avoid avoid TensorBoard plot issue
-import shutil
-if os.path.exists('logs/') and os.path.isdir('logs/'):
-    shutil.rmtree('logs/')
-
-# import TensorBoard
-from torch.utils.tensorboard import SummaryWriter
-
-# create a directory to store TensorBoard logs
-log_dir = 'logs/'
-os.makedirs(log_dir, exist_ok = True)
-
-# initialize TensorBoard writer
-writer = SummaryWriter(log_dir = log_dir)
-
-# set the number of epochs (how many times the model will pass over the training data)
-epochs = 30
-
-# lists to store training and validation loss, accuracy, predictions, and true labels
-train_losses = []
-val_losses = []
-train_accuracies = []
-val_accuracies = []
-y_pred_tracker = []
-y_true_tracker = []
-
-# parameters needed for early stopping
-best_val_loss = float('inf') # initalize to large value
-epochs_without_improvement = 0 # keeps track of number of epochs were validation loss has not improved
-patience = 10 # once validation loss has not improved for more than 10 epochs, break validation loop
-
-# create training and testing loop for model_2
-for epoch in range(epochs):
-    print(f"Epoch: {epoch}\n-------")
-
-    # parameters to keep track of training over epochs
-    train_loss = 0
-    train_correct = 0
-    train_total = 0
-    train_accuracy = 0
-
-    # set the model to train mode
-    model_2.train()
-
-    # loop over each batch of data (recall the batch size of 32)
-    for batch, (X, y) in enumerate(train_dataloader):
-
-        # forward pass (model outputs raw logits)
-        y_logits = model_2(X).squeeze()
-
-        # convert logits to binary predictions (0 or 1)
-        y_pred = torch.round(torch.sigmoid(y_logits))
-
-        # calculate loss
-        loss = loss_fn(y_logits, y)
-
-        # optimizer zero grad
-        optimizer_2.zero_grad()
-
-        # backward pass
-        loss.backward()
+# evaluate a trained model on the test set, returns the true and predicted labels
+# (test_data is a (features, labels) pair on the same device as the model)
+def test(model, test_data):
+    # unpack the testing set and its size
+    X_test_tensor, y_test_tensor = test_data
+    n_test = X_test_tensor.shape[0]
 
-        # update parameters
-        optimizer_2.step()
+    # set model to evaluation mode
+    model.eval()
 
-        # accumulate batch loss
-        train_loss += loss.item()
+    # fuse the layers of the model into an equivalent inference only network for testing
+    model_fused = model.fuse_for_inference()
 
-        # accumulate correct predictions
-        train_correct += (y_pred == y).sum().item()
-
-        # accumulate total number of training examples (increases by 32 each time)
-        train_total += len(y)
-
-    # divide total train loss by length of train dataloader (average loss per batch for the epoch)
-    train_loss /= len(train_dataloader)
-
-    # append the training loss for the epoch to the train_losses list
-    train_losses.append(train_loss)
-
-    # write the training loss to file (used for TensorBoard)
-    writer.add_scalar('Loss/Train', train_loss, epoch)
-
-    # calculate training accuracy for the epoch
-    train_accuracy = 100 * train_correct / train_total
-
-    # append the accuracy for the epoch to the train_accur list
-    train_accuracies.append(train_accuracy)
-
-    # write the training accuracy to a file (used for TensorBoard)
-    writer.add_scalar('Accuracy/Train', train_accuracy, epoch)
-
-    # parameters to keep track of validation over epochs
-    val_loss = 0
-    val_correct = 0
-    val_total = 0
-    val_accuracy = 0
-
-    # set the model to evaluation model
-    model_2.eval()
-
-    # begin the inference procedure
+    # begin the inference procedure (the whole test set fits in memory, so it is a single forward pass)
     with torch.inference_mode():
-        # loop through each batch of data in the validation set
-        for batch, (X, y) in enumerate(val_dataloader):
-
-            # forward pass
-            y_logits = model_2(X).squeeze()
-
-            # convert logits to binary predictions (0 or 1)
-            y_pred = torch.round(torch.sigmoid(y_logits))
-
-            # accumulate validation loss
-            val_loss += loss_fn(y_logits, y).item()
-
-            # accumulate correct predictions
-            val_correct += (y_pred == y).sum().item()
-
-            # accumulate the length of the batch size (increases by 32 each time)
-            val_total += len(y)
-
-        # check if the validation loss has improved for this epoch
-        if val_loss < best_val_loss:
-            # update the best validation loss
-            best_val_loss = val_loss
-            # reset the counter
-            counter = 0
-        # if validation loss did not improve, increase the counter
-        else:
-            counter += 1
-
-        # if early stopping criteria has been met, break the loop
-        if counter >= patience:
-            print(f'Early stopping: No improvement in validation loss for {patience} epochs.')
-            break
-
-        # divide total validation loss by length of validation dataloader (average loss per batch for epoch)
-        val_loss /= len(val_dataloader)
-
-        # append the validation loss for the epoch to the train_losses list
-        val_losses.append(val_loss)
-
-        # write the validation loss to file (used for TensorBoard)
-        writer.add_scalar('Loss/Validation', val_loss, epoch)
-
-        # Calculate validation accuracy for the epoch
-        val_accuracy = 100 * val_correct / val_total
-
-        # append the accuracy for the epoch to the train_accur list
-        val_accuracies.append(val_accuracy)
-
-        # convert y_pred from a tensor to a numpy array
-        y_pred_numpy = y_pred.numpy()
-
-        # convert true y label from tensor to numpy array
-        y_true_numpy = y.numpy()
-
-        # append the predictions for the batch to the y_pred_tracker list
-        y_pred_tracker.extend(y_pred_numpy)
-
-        # append the true labels for the batch to the y_true_tracker list
-        y_true_tracker.extend(y_true_numpy)
-
-        # write the validation accuracy to file (used for TensorBoard)
-        writer.add_scalar('Accuracy/Validation', val_accuracy, epoch)
-
-    # print training loss and accuracy for each epoch
-    print(f'Train loss: {train_loss:.5f} | Training acc: {train_accuracy:.2f} %\n')
-
-    # print validation loss and accuracy for each epoch
-    print(f'Validation loss: {val_loss:.5f} |  Validation acc: {val_accuracy:.2f} %\n')
-
-# mean training loss and accuracy
-print(f'The mean training loss and accuracy over {epochs} epochs is {np.array(train_losses).mean().round(4)} \
-    and {np.array(train_accuracies).mean().round(4)}, respectively.')
-
-# mean validation loss and accuracy
-print(f'The mean validation loss and accuracy over {epochs} epochs is {np.array(val_losses).mean().round(4)} \
-    and {np.array(val_accuracies).mean().round(4)}.')
+        # calculate the predicted logits
+        y_logits = model_fused(X_test_tensor).squeeze()
 
-# plot training loss and validation loss
-plt.figure(figsize=(10, 8))
-plt.subplot(2, 1, 1)
-plt.plot(range(len(train_losses)), train_losses, label = 'Training Loss', color = 'blue')
-plt.plot(range(len(val_losses)), val_losses, label = 'Validation Loss', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Loss')
-plt.title('Training and Validation Loss Over Epochs')
-plt.legend()
+        # convert logits to binary predictions (0 or 1), sigmoid(x) > 0.5 is the same as x > 0
+        y_pred = (y_logits > 0).to(y_test_tensor.dtype)
 
-# plot training accuracy and validation accuracy
-plt.subplot(2, 1, 2)
-plt.plot(range(len(train_accuracies)), train_accuracies, label = 'Training Accuracy', color = 'blue')
-plt.plot(range(len(val_accuracies)), val_accuracies, label = 'Validation Accuracy', color = 'red')
-plt.xlabel('Epoch')
-plt.ylabel('Accuracy')
-plt.title('Training and Validation Accuracy Over Epochs')
-plt.legend()
+        # calculate testing loss
+        test_loss = loss_fn(y_logits, y_test_tensor).item()
 
-# show the above plots
-plt.tight_layout()
-plt.show()
+        # calculate testing accuracy
+        test_correct = (y_pred == y_test_tensor).sum().item()
+        test_accuracy = 100 * test_correct / n_test
 
-# create confusion matrix
-conf_matrix = confusion_matrix(y_true_tracker, y_pred_tracker)
+    # convert the predictions and the true labels to numpy arrays
+    y_pred_tracker = y_pred.cpu().numpy()
+    y_true_tracker = y_test_tensor.cpu().numpy()
 
-# create a heatmap of the confusion matrix
-plt.figure(figsize=(8, 6))
-sns.heatmap(conf_matrix, annot = True, fmt = 'd', cmap = 'Blues',
-            xticklabels=['Predicted 0', 'Predicted 1'],
-            yticklabels=['Actual 0', 'Actual 1'])
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix')
-plt.show()
+    # printing testing loss and accuracy
+    print(f'Test loss: {test_loss:.5f} | Testing acc: {test_accuracy:.4f}%\n')
 
+    return y_true_tracker, y_pred_tracker
 
 
 """
 
-Neural Network Testing with Model 1
+Main
 
 """
 
 
-# defining the loss function
-loss_fn = nn.BCEWithLogitsLoss()
-
-# parameters needed for early stopping
-best_val_loss = float('inf')
-epochs_without_improvement = 0
-patience = 10
-
-# set seed for reproducibility
-torch.manual_seed(1024)
-
-# initialize values to keep track of testing
-test_loss = 0
-test_correct = 0
-test_total = 0
-test_accuracy = 0
-y_pred_tracker = []
-y_true_tracker = []
-
-# set model to evaluation mode
-model_1.eval()
+if __name__ == "__main__":
+    # command line arguments
+    parser = argparse.ArgumentParser(description = 'UCI Adult prediction using PyTorch neural networks')
+    parser.add_argument('--plot', action = 'store_true',
+                        help = 'show the data, training, and confusion matrix plots')
+    args = parser.parse_args()
 
-# begin the inference procedure
-with torch.inference_mode():
-    # loop through each batch of data in the test set
-    for batch, (X, y) in enumerate(test_dataloader):
-
-        # calculate the predicted logits
-        y_logits = model_1(X).squeeze()
+    # checking out the batches
+    print(f"Length of train data: {n_train_batches} batches of {batch_size}")
+    print(f"Length of val data: {n_val_batches} batches of {batch_size}")
+    print(f"Length of test data: {n_test} observations in a single batch")
 
-        # convert logits to binary predictions (0 or 1)
-        y_pred = torch.round(torch.sigmoid(y_logits))
+    # move the training, validation, and testing sets to the device once
+    train_data, val_data, test_data = load_to_device()
 
-        # accumulate the loss
-        test_loss += loss_fn(y_logits, y).item()
+    # instantiate the models (input should be shape of feature matrix)
+    model_0, model_1, model_2 = build_models(input_shape = X_train_tensor.shape[1])
 
-        # accumulate correct predictions
-        test_correct += (y_pred == y).sum().item()
+    # plots of the original data
+    if args.plot:
+        make_plots(df)
 
-        # accumulate the the total of observations tested this batch
-        test_total += len(y)
+    # delete the 'logs' directory once before running any training and validation loop to avoid TensorBoard plot issue
+    if os.path.exists('logs/') and os.path.isdir('logs/'):
+        shutil.rmtree('logs/')
 
-        # convert y_pred from a tensor to a numpy array
-        y_pred_numpy = y_pred.numpy()
+    # train and validate each model (SGD with momentum seemed to work best), each model logs to its
+    # own TensorBoard subdirectory so the runs can be compared
+    for name, model in [('model_0', model_0), ('model_1', model_1), ('model_2', model_2)]:
+        print(f"Training {name}\n=======")
 
-        # convert true y label from tensor to numpy array
-        y_true_numpy = y.numpy()
+        # defining the optimizer (the learning rate is scaled by sqrt(512 / 32) = 4 along with the batch size,
+        # foreach updates all parameter tensors with a single multi-tensor kernel call)
+        optimizer = torch.optim.SGD(params = model.parameters(), lr = 0.04, momentum = 0.9, nesterov = True,
+                                    foreach = True)
 
-        # append the predictions for the batch to the y_pred_tracker list
-        y_pred_tracker.extend(y_pred_numpy)
+        # set seed for reproducibility
+        torch.manual_seed(1024)
 
-        # append the true labels for the batch to the y_true_tracker list
-        y_true_tracker.extend(y_true_numpy)
+        # initialize TensorBoard writer
+        writer = SummaryWriter(log_dir = f'logs/{name}')
 
-    # calculate testing loss
-    test_loss /= len(test_dataloader)
+        # run the training and validation loop
+        train_losses, val_losses, train_accuracies, val_accuracies, y_true_tracker, y_pred_tracker = \
+            train(model, optimizer, writer, train_data, val_data)
 
-    # calculate testing accuracy for the epoch
-    test_accuracy = 100 * test_correct / test_total
+        # flush any queued TensorBoard events to disk and close the writer
+        writer.close()
 
-# printing testing loss and accuracy
-print(f'Test loss: {test_loss:.5f} | Testing acc: {test_accuracy:.4f}%\n')
+        # plot the training history and confusion matrix
+        if args.plot:
+            plot_training(train_losses, val_losses, train_accuracies, val_accuracies)
+            plot_confusion_matrix(y_true_tracker, y_pred_tracker)
 
-# create confusion matrix
-conf_matrix = confusion_matrix(y_true_tracker, y_pred_tracker)
+    # test the linear baseline model_0 and the chosen model_1
+    for name, model in [('model_0', model_0), ('model_1', model_1)]:
+        print(f"Testing {name}\n=======")
+        y_true_tracker, y_pred_tracker = test(model, test_data)
 
-# create a heatmap of the confusion matrix
-plt.figure(figsize=(8, 6))
-sns.heatmap(conf_matrix, annot = True, fmt = 'd', cmap = 'Blues',
-            xticklabels=['Predicted 0', 'Predicted 1'],
-            yticklabels=['Actual 0', 'Actual 1'])
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix')
-plt.show()
+        # plot the testing confusion matrix
+        if args.plot:
+            plot_confusion_matrix(y_true_tracker, y_pred_tracker)